@@ -1,23 +1,40 @@
+import micropython
 from array import array
 from utime import ticks_ms, ticks_diff
 
 _DISP_W                  = 128
+_DISP_MASK               = _DISP_W - 1
 _WAV_TOP                 = 17      # first y pixel of waveform (below header + separator)
 _WAV_H                   = 38      # y=17..54
 _STATUS_Y                = 56      # status bar top
 _HEART_SIZE              = 16      # heart bitmap dimension
 _COMPUTE_INTERVAL_MS     = 2000    # BPM + SpO2 recompute cadence
 _DRAW_INTERVAL_MS        = 300     # display refresh cadence
-_NORM_RECOMPUTE_INTERVAL = 256     # samples between full min/max recompute
-_HR_WINDOW_SIZE          = 250
-_HR_SMOOTHING_WINDOW     = 15
-_HR_BPM_BUFFER_SIZE      = 5
+_WAV_SEQ_MASK            = 0xFFFF  # waveform sample counter wrap (fits array('H'))
+_HR_SAMPLE_RATE          = 50      # Hz per popped sample: main.py's 400 Hz / 8-sample average
+_HR_WINDOW_SIZE          = 256     # 5.1 s; power of two: index wraps with _HR_WINDOW_MASK
+_HR_WINDOW_MASK          = _HR_WINDOW_SIZE - 1
+_HR_SMOOTHING_WINDOW     = 15      # 0.3 s, as in the reference HeartRateMonitor
+_HR_BPM_BUFFER_SIZE      = 5       # _median5 is hardwired to this size
 _HR_MIN_BPM              = 40
 _HR_MAX_BPM              = 200
 _HR_MIN_PEAK_MS          = 300
+# Peaks 300 ms apart that fit one window at _HR_SAMPLE_RATE, as in the
+# reference HeartRateMonitor; _find_peaks() stops here if samples stall
+_HR_MAX_PEAKS            = (_HR_WINDOW_SIZE * 1000) // (_HR_SAMPLE_RATE * _HR_MIN_PEAK_MS) + 2
+_HR_MIN_INTERVAL_MS      = 60000 // _HR_MAX_BPM   # 300 ms
+_HR_MAX_INTERVAL_MS      = 60000 // _HR_MIN_BPM   # 1500 ms
 _IR_FINGER_THRESHOLD     = 10000
-_IR_AVG_WINDOW           = 20
-_SPO2_WINDOW             = 20
+_IR_WINDOW               = 32      # finger average + SpO2 window; power of two
+_IR_WINDOW_MASK          = _IR_WINDOW - 1
+_IR_FINGER_SUM_THRESHOLD = _IR_FINGER_THRESHOLD * _IR_WINDOW   # window-sum equivalent
+_BPM_NONE_STR            = "--- BPM"
+_SPO2_NONE_STR           = " -- %"
+_BEAT_DEFAULT_MS         = 600     # heart animation period with no BPM yet
+
+# Zero source for resetting rings by slice assignment (largest cleared ring)
+_ZEROS    = array('i', [0] * _DISP_W)
+_ZEROS_MV = memoryview(_ZEROS)
 
 _HEART_LARGE = (b'\x00\x00\x70\x0E\xF8\x1F\xFC\x3F'
                 b'\xFE\x7F\xFF\xFF\xFF\xFF\xFF\xFF'
@@ -29,71 +46,170 @@ _HEART_SMALL = (b'\x00\x00\x00\x00\x38\x1C\x7C\x3E'
                 b'\x03\xC0\x01\x80\x00\x00\x00\x00')
 
 
+@micropython.viper
+def _smooth(raw: ptr32, sig: ptr32, n: int, out: ptr32):
+    """Centred moving average of raw into sig; out[0], out[1] = sum, max.
+
+    The window is truncated at both ends of the buffer. The loop is split
+    into head (window still growing), middle (full window, no bounds
+    checks) and tail (window shrinking); n must be at least the window.
+    The mean is not subtracted: callers compare against mean + threshold.
+    """
+    half  = int(_HR_SMOOTHING_WINDOW) >> 1
+    win   = int(_HR_SMOOTHING_WINDOW)
+    acc   = 0
+    count = half
+    for i in range(half):
+        acc += raw[i]
+    total = 0
+    top   = 0
+
+    # Head: the leading edge enters, nothing has left yet
+    for i in range(half):
+        acc   += raw[i + half]
+        count += 1
+        v      = acc // count
+        sig[i] = v
+        total += v
+        if v > top:
+            top = v
+
+    # Middle: full window of win samples
+    for i in range(half, n - half):
+        acc   += raw[i + half]
+        v      = acc // win
+        sig[i] = v
+        total += v
+        if v > top:
+            top = v
+        acc   -= raw[i - half]
+
+    # Tail: nothing left to enter, the trailing edge keeps leaving
+    count = win - 1
+    for i in range(n - half, n):
+        v      = acc // count
+        sig[i] = v
+        total += v
+        if v > top:
+            top = v
+        acc   -= raw[i - half]
+        count -= 1
+
+    out[0] = total
+    out[1] = top
+
+
+@micropython.viper
+def _find_peaks(sig: ptr32, ring: ptr32, out: ptr32, p: ptr32) -> int:
+    """Local maxima above level with a refractory period.
+
+    p holds [oldest ring slot, n, level]. sig is the unwrapped window; the
+    timestamp ring is read in place, and only at candidate peaks. Accepted
+    peak timestamps are written to out[0:count], at most _HR_MAX_PEAKS.
+
+    A peak is a rise followed by a fall (the slope changes sign), so each
+    sample costs one load and one or two compares. Equal neighbours keep
+    the last slope, and a flat top is timed at its first sample.
+    """
+    mask   = int(_HR_WINDOW_MASK)
+    min_ms = int(_HR_MIN_PEAK_MS)
+    cap    = int(_HR_MAX_PEAKS)
+    base   = p[0]
+    n      = p[1]
+    level  = p[2]
+    count  = 0
+    last   = ring[base] - min_ms * 2  # allow first peak
+    up     = 0
+    apex   = 0
+    v      = sig[0]
+    for i in range(n - 1):
+        nxt = sig[i + 1]
+        if nxt > v:
+            up   = 1
+            apex = i + 1
+        elif nxt < v:
+            if up and v > level:
+                t = ring[(base + apex) & mask]
+                # ticks_diff() for the 2**30 ticks period, in machine ints
+                if ((t - last + 0x20000000) & 0x3FFFFFFF) - 0x20000000 >= min_ms:
+                    out[count] = t
+                    count += 1
+                    last = t
+                    if count == cap:
+                        break
+            up = 0
+        v = nxt
+    return count
+
+
 class _HRAlgorithm:
     """Integer-only heart-rate detection — ported from HeartRateMonitor."""
 
     def __init__(self):
-        self._samples    = array('l', [0] * _HR_WINDOW_SIZE)
-        self._timestamps = array('l', [0] * _HR_WINDOW_SIZE)
+        self._samples    = array('i', [0] * _HR_WINDOW_SIZE)
+        self._timestamps = array('i', [0] * _HR_WINDOW_SIZE)
         self._n          = 0
 
-        self._smooth_buf   = array('l', [0] * _HR_SMOOTHING_WINDOW)
-        self._smooth_idx   = 0
-        self._smooth_sum   = 0
-        self._smooth_count = 0
-
-        self._bpm_buf   = array('l', [0] * _HR_BPM_BUFFER_SIZE)
+        self._bpm_buf   = array('B', [0] * _HR_BPM_BUFFER_SIZE)   # 40..200
         self._bpm_count = 0
 
         # Pre-allocated working arrays to avoid per-call heap allocation
-        self._sig = array('l', [0] * _HR_WINDOW_SIZE)
-        self._ts  = array('l', [0] * _HR_WINDOW_SIZE)
+        self._sig_raw     = array('i', [0] * _HR_WINDOW_SIZE)
+        self._sig         = array('i', [0] * _HR_WINDOW_SIZE)
+        self._sig_stats   = array('i', [0, 0])      # _smooth() sum, max
+        self._peak_params = array('i', [0, 0, 0])   # _find_peaks() oldest slot, n, level
+        self._peaks_ts    = array('i', [0] * _HR_MAX_PEAKS)
 
     def reset(self):
-        for i in range(_HR_WINDOW_SIZE):
-            self._samples[i]    = 0
-            self._timestamps[i] = 0
-        self._n = 0
-
-        for i in range(_HR_SMOOTHING_WINDOW):
-            self._smooth_buf[i] = 0
-        self._smooth_idx   = 0
-        self._smooth_sum   = 0
-        self._smooth_count = 0
-
-        for i in range(_HR_BPM_BUFFER_SIZE):
-            self._bpm_buf[i] = 0
+        # Sample, timestamp and BPM rings are only read up to _n / _bpm_count,
+        # so resetting the counters is enough
+        self._n         = 0
         self._bpm_count = 0
 
-    def _buf_get(self, buf, age):
-        return buf[(self._n - 1 - age) % _HR_WINDOW_SIZE]
-
+    @micropython.native
     def add_sample(self, ir):
         ts  = ticks_ms()
-        idx = self._n % _HR_WINDOW_SIZE
+        idx = self._n & _HR_WINDOW_MASK
         self._samples[idx]    = ir
         self._timestamps[idx] = ts
         self._n += 1
 
-        old = self._smooth_buf[self._smooth_idx]
-        self._smooth_buf[self._smooth_idx] = ir
-        self._smooth_sum += ir - old
-        self._smooth_idx = (self._smooth_idx + 1) % _HR_SMOOTHING_WINDOW
-        if self._smooth_count < _HR_SMOOTHING_WINDOW:
-            self._smooth_count += 1
-
     @staticmethod
     def _median(buf, n):
-        tmp = [buf[i] for i in range(n)]
-        for i in range(1, n):
-            key = tmp[i]
-            j = i - 1
-            while j >= 0 and tmp[j] > key:
-                tmp[j + 1] = tmp[j]
-                j -= 1
-            tmp[j + 1] = key
-        mid = n // 2
-        return tmp[mid] if n % 2 == 1 else (tmp[mid - 1] + tmp[mid]) // 2
+        """Median of the first 1..4 entries during warm-up, by compare-and-swap."""
+        a = buf[0]
+        if n == 1:
+            return a
+        b = buf[1]
+        if a > b: a, b = b, a
+        if n == 2:
+            return (a + b) // 2
+        c = buf[2]
+        if n == 3:
+            return max(a, min(b, c))
+        d = buf[3]
+        if c > d: c, d = d, c
+        return (max(a, c) + min(b, d)) // 2
+
+    @staticmethod
+    def _median5(buf):
+        """Median of a full 5-entry buffer via a 9-comparator sorting network."""
+        a = buf[0]; b = buf[1]; c = buf[2]; d = buf[3]; e = buf[4]
+        if a > b: a, b = b, a
+        if c > d: c, d = d, c
+        if a > c: a, c = c, a
+        if b > d: b, d = d, b
+        if b > c: b, c = c, b
+        if a > e: a, e = e, a
+        if b > e: b, e = e, b
+        if c > e: c, e = e, c
+        if d > e: d, e = e, d
+        return c
+
+    def _bpm_median(self):
+        if self._bpm_count >= _HR_BPM_BUFFER_SIZE:
+            return self._median5(self._bpm_buf)
+        return self._median(self._bpm_buf, self._bpm_count)
 
     def calculate_heart_rate(self):
         filled = min(self._n, _HR_WINDOW_SIZE)
@@ -101,72 +217,117 @@ class _HRAlgorithm:
             return None
 
         sig_len = filled
+        sig_raw = self._sig_raw
         sig     = self._sig
-        ts      = self._ts
-        half    = _HR_SMOOTHING_WINDOW // 2
-
-        # Build integer moving-average smoothed signal (oldest → newest)
-        for i in range(sig_len):
-            age   = sig_len - 1 - i
-            ts[i] = self._buf_get(self._timestamps, age)
-            acc   = 0
-            count = 0
-            for j in range(-half, half + 1):
-                a = age + j
-                if 0 <= a < filled:
-                    acc   += self._buf_get(self._samples, a)
-                    count += 1
-            sig[i] = acc // count if count else 0
-
-        # DC removal: subtract integer mean
-        total = 0
-        for i in range(sig_len):
-            total += sig[i]
-        mean = total // sig_len
-        for i in range(sig_len):
-            sig[i] -= mean
-
-        # Dynamic threshold at 30% of positive peak
-        max_val = 0
-        for i in range(sig_len):
-            if sig[i] > max_val:
-                max_val = sig[i]
-        threshold = (max_val * 3) // 10
-
-        # Peak detection with refractory period
-        peaks_ts     = []
-        last_peak_ts = ts[0] - _HR_MIN_PEAK_MS * 2  # allow first peak
-
-        for i in range(1, sig_len - 1):
-            if (sig[i] > threshold
-                    and sig[i] > sig[i - 1]
-                    and sig[i] > sig[i + 1]):
-                t = ts[i]
-                if ticks_diff(t, last_peak_ts) >= _HR_MIN_PEAK_MS:
-                    peaks_ts.append(t)
-                    last_peak_ts = t
-
-        if len(peaks_ts) < 2:
-            if self._bpm_count == 0:
-                return None
-            n = min(self._bpm_count, _HR_BPM_BUFFER_SIZE)
-            return self._median(self._bpm_buf, n)
-
-        # Intervals → BPM with physiological clamping
-        for i in range(1, len(peaks_ts)):
-            interval = ticks_diff(peaks_ts[i], peaks_ts[i - 1])
-            if interval <= 0:
-                continue
-            bpm = 6000000 // interval // 100
-            if _HR_MIN_BPM <= bpm <= _HR_MAX_BPM:
-                idx = self._bpm_count % _HR_BPM_BUFFER_SIZE
-                self._bpm_buf[idx] = bpm
-                self._bpm_count += 1
-
-        if self._bpm_count == 0:
+        ts      = self._peaks_ts
+
+        # Unwrap the sample ring once (oldest → newest) so the smoothing
+        # kernel indexes linearly. Timestamps are only needed at peaks, so
+        # _find_peaks() reads them from the ring in place
+        samples = memoryview(self._samples)
+        base    = (self._n - filled) & _HR_WINDOW_MASK
+        if base == 0:
+            sig_raw[:filled] = samples[:filled]
+        else:
+            tail = _HR_WINDOW_SIZE - base
+            sig_raw[:tail] = samples[base:]
+            sig_raw[tail:] = samples[:base]
+
+        # Smoothing, then peaks more than 30% of the positive excursion above
+        # the mean. The mean is folded into the level instead of being
+        # subtracted from every sample: v - mean > t  <=>  v > mean + t
+        stats = self._sig_stats
+        _smooth(sig_raw, sig, sig_len, stats)
+        mean    = stats[0] // sig_len
+        level   = mean + ((stats[1] - mean) * 3) // 10
+        p       = self._peak_params
+        p[0]    = base
+        p[1]    = sig_len
+        p[2]    = level
+        n_peaks = _find_peaks(sig, self._timestamps, ts, p)
+
+        # Intervals → BPM, clamped physiologically on the interval so only
+        # accepted beats pay for the division
+        bpm_buf = self._bpm_buf
+        count   = self._bpm_count
+        tdiff   = ticks_diff
+        for i in range(1, n_peaks):
+            interval = tdiff(ts[i], ts[i - 1])
+            if _HR_MIN_INTERVAL_MS <= interval <= _HR_MAX_INTERVAL_MS:
+                bpm_buf[count % _HR_BPM_BUFFER_SIZE] = 60000 // interval
+                count += 1
+        self._bpm_count = count
+
+        # Fewer than two peaks falls back to the median of earlier readings
+        if count == 0:
             return None
-        n = min(self._bpm_count, _HR_BPM_BUFFER_SIZE)
-        return self._median(self._bpm_buf, n)
+        return self._bpm_median()
+
+
+@micropython.viper
+def _spo2_stats(ir: ptr32, red: ptr32, n: int, out: ptr32):
+    """Single pass over the SpO2 windows.
+
+    Writes out[0..4] = red_sum, ir_min, ir_max, red_min, red_max; the IR sum
+    is already kept as a running sum.
+    """
+    red_sum = 0
+    ir_min  = ir[0];   ir_max  = ir_min
+    red_min = red[0];  red_max = red_min
+    for i in range(n):
+        iv = ir[i];  rv = red[i]
+        red_sum += rv
+        if iv < ir_min:  ir_min  = iv
+        if iv > ir_max:  ir_max  = iv
+        if rv < red_min: red_min = rv
+        if rv > red_max: red_max = rv
+    out[0] = red_sum
+    out[1] = ir_min
+    out[2] = ir_max
+    out[3] = red_min
+    out[4] = red_max
+
+
+@micropython.viper
+def _draw_wav(fb: ptr8, raw: ptr32, p: ptr32):
+    """OR the waveform trace straight into a MONO_VLSB framebuffer.
+
+    p holds [oldest ring slot, window min, window range]. Column x joins the
+    previous sample's y to this one's with a vertical span, written as one
+    byte OR per 8-pixel page; x=0 only seeds the first y. A zero range draws
+    the centre line.
+    """
+    w     = int(_DISP_W)
+    mask  = int(_DISP_MASK)
+    bot   = int(_WAV_TOP) + int(_WAV_H) - 1         # y=54
+    scale = int(_WAV_H) - 1
+    w_idx = p[0]
+    mn    = p[1]
+    rng   = p[2]
+    if rng > 0:
+        prev_y = bot - ((raw[w_idx] - mn) * scale) // rng
+    else:
+        prev_y = bot - (int(_WAV_H) >> 1)
+    for x in range(1, w):
+        if rng > 0:
+            cur_y = bot - ((raw[(w_idx + x) & mask] - mn) * scale) // rng
+        else:
+            cur_y = prev_y
+        y0 = cur_y
+        y1 = prev_y
+        if y0 > y1:
+            y0 = prev_y
+            y1 = cur_y
+        p0 = y0 >> 3
+        p1 = y1 >> 3
+        for page in range(p0, p1 + 1):
+            bits = 0xFF
+            if page == p0:
+                bits &= 0xFF << (y0 & 7)
+            if page == p1:
+                bits &= 0xFF >> (7 - (y1 & 7))
+            fb[page * w + x] |= bits
+        prev_y = cur_y
 
 
 class HeartVitalsDisplay:
@@ -177,30 +338,33 @@ class HeartVitalsDisplay:
         self._display = display
 
         # Pre-allocated buffers
-        self._wav_raw      = array('l', [0] * _DISP_W)   # raw IR ring for normalisation
-        self._wav_y        = bytearray(_DISP_W)           # normalised waveform y-coords
-        self._ir_avg_buf   = array('l', [0] * _IR_AVG_WINDOW)
-        self._spo2_ir_buf  = array('l', [0] * _SPO2_WINDOW)
-        self._spo2_red_buf = array('l', [0] * _SPO2_WINDOW)
+        self._wav_raw        = array('i', [0] * _DISP_W)       # raw IR ring, normalised at draw time
+        self._wav_min_dq     = array('H', [0] * _DISP_W)       # sliding-min deque (sample numbers)
+        self._wav_max_dq     = array('H', [0] * _DISP_W)       # sliding-max deque (sample numbers)
+        self._ir_window_buf  = array('i', [0] * _IR_WINDOW)    # finger average + SpO2 IR
+        self._red_window_buf = array('i', [0] * _IR_WINDOW)    # SpO2 red, same slots
+        self._wav_params     = array('i', [0, 0, 0])           # _draw_wav() arguments
+        self._spo2_stats     = array('i', [0] * 5)             # _spo2_stats() results
 
         # Ring indices / counters
-        self._wav_idx      = 0
-        self._ir_avg_idx   = 0
-        self._ir_avg_sum   = 0
-        self._ir_avg_count = 0
-        self._spo2_idx     = 0
-        self._spo2_count   = 0
-
-        # Waveform normalisation state
-        self._wav_raw_min = 0x7FFFFFFF
-        self._wav_raw_max = 0
-        self._norm_ctr    = 0
+        self._wav_seq      = 0       # next waveform sample number; ring slot is & _DISP_MASK
+        self._ir_window_idx   = 0
+        self._ir_window_sum   = 0
+        self._ir_window_count = 0
+        self._spo2_count      = 0   # finger samples in the window
+
+        self._reset_waveform()
 
         # Vitals state
-        self._bpm     = None
-        self._spo2    = None
-        self._finger  = False
-        self._quality = 0
+        self._bpm      = None
+        self._spo2     = None
+        self._bpm_str  = _BPM_NONE_STR
+        self._spo2_str = _SPO2_NONE_STR
+        self._finger   = False
+
+        # Heart animation period and large-bitmap phase, refreshed with _bpm
+        self._beat_ms       = _BEAT_DEFAULT_MS
+        self._beat_large_ms = _BEAT_DEFAULT_MS // 4
 
         # Timing references
         now = ticks_ms()
@@ -211,11 +375,6 @@ class HeartVitalsDisplay:
 
         self._hr = _HRAlgorithm()
 
-        # Initialise waveform to centre line
-        centre = _WAV_H // 2
-        for i in range(_DISP_W):
-            self._wav_y[i] = centre
-
     # ------------------------------------------------------------------ #
 
     def update(self):
@@ -231,24 +390,36 @@ class HeartVitalsDisplay:
 
     # ------------------------------------------------------------------ #
 
+    @micropython.native
     def _poll_sensor(self):
         sensor = self._sensor
         sensor.check()
 
-        while sensor.available():
-            ir  = sensor.pop_ir_from_storage()
-            red = sensor.pop_red_from_storage()
-
-            # Running average for finger detection
-            old = self._ir_avg_buf[self._ir_avg_idx]
-            self._ir_avg_buf[self._ir_avg_idx] = ir
-            self._ir_avg_sum  += ir - old
-            self._ir_avg_idx   = (self._ir_avg_idx + 1) % _IR_AVG_WINDOW
-            if self._ir_avg_count < _IR_AVG_WINDOW:
-                self._ir_avg_count += 1
-
-            if self._ir_avg_count >= _IR_AVG_WINDOW:
-                finger_now = (self._ir_avg_sum // _IR_AVG_WINDOW) >= _IR_FINGER_THRESHOLD
+        # Bind per-sample callees and buffers once for the drain loop
+        available = sensor.available
+        pop       = sensor.pop_sample
+        hr_add    = self._hr.add_sample
+        push_wav  = self._push_waveform
+        ir_buf    = self._ir_window_buf
+        red_buf   = self._red_window_buf
+
+        while available():
+            red, ir = pop()
+
+            # Shared IR window: running average for finger detection and the
+            # SpO2 IR DC term; red is stored in the same slot for SpO2
+            idx = self._ir_window_idx
+            old = ir_buf[idx]
+            ir_buf[idx]  = ir
+            red_buf[idx] = red
+            self._ir_window_sum += ir - old
+            self._ir_window_idx  = (idx + 1) & _IR_WINDOW_MASK
+            if self._ir_window_count < _IR_WINDOW:
+                self._ir_window_count += 1
+
+            if self._ir_window_count >= _IR_WINDOW:
+                # sum // N >= T  <=>  sum >= N * T: no division per sample
+                finger_now = self._ir_window_sum >= _IR_FINGER_SUM_THRESHOLD
             else:
                 finger_now = ir >= _IR_FINGER_THRESHOLD
 
@@ -258,112 +429,110 @@ class HeartVitalsDisplay:
                 self._finger_start_ms = 0
                 self._bpm        = None
                 self._spo2       = None
+                self._bpm_str    = _BPM_NONE_STR
+                self._spo2_str   = _SPO2_NONE_STR
                 self._spo2_count = 0
-                self._spo2_idx   = 0
+                self._beat_ms       = _BEAT_DEFAULT_MS
+                self._beat_large_ms = _BEAT_DEFAULT_MS // 4
                 self._hr.reset()
 
                 # Clear IR average so re-placement detection starts fresh
-                for i in range(_IR_AVG_WINDOW):
-                    self._ir_avg_buf[i] = 0
-                self._ir_avg_sum   = 0
-                self._ir_avg_count = 0
-
-                # Reset waveform normalisation and flatten display
-                self._wav_raw_min = 0x7FFFFFFF
-                self._wav_raw_max = 0
-                for i in range(_DISP_W):
-                    self._wav_raw[i] = 0
-                centre = _WAV_H // 2
-                for i in range(_DISP_W):
-                    self._wav_y[i] = centre
+                ir_buf[:] = _ZEROS_MV[:_IR_WINDOW]
+                self._ir_window_sum   = 0
+                self._ir_window_count = 0
+
+                # A flat ring draws as the centre line
+                self._reset_waveform()
 
             elif not self._finger and finger_now:
                 self._finger          = True
                 self._finger_start_ms = ticks_ms()
 
             if self._finger:
-                self._hr.add_sample(ir)
-                self._spo2_ir_buf[self._spo2_idx]  = ir
-                self._spo2_red_buf[self._spo2_idx] = red
-                self._spo2_idx = (self._spo2_idx + 1) % _SPO2_WINDOW
-                if self._spo2_count < _SPO2_WINDOW:
+                hr_add(ir)
+                if self._spo2_count < _IR_WINDOW:
                     self._spo2_count += 1
 
-            self._push_waveform(ir if self._finger else 0)
+            push_wav(ir if self._finger else 0)
 
     # ------------------------------------------------------------------ #
 
+    def _reset_waveform(self):
+        # Zero the ring and seed each deque with the newest zero, so the
+        # deques describe a window full of zeros: every sample the draw reads
+        # then lies inside [min, max]
+        self._wav_raw[:] = _ZEROS
+        last = (self._wav_seq - 1) & _WAV_SEQ_MASK
+        self._wav_min_dq[0] = last
+        self._wav_max_dq[0] = last
+        self._wav_min_head  = 0
+        self._wav_min_len   = 1
+        self._wav_max_head  = 0
+        self._wav_max_len   = 1
+
+    @micropython.native
     def _push_waveform(self, ir_val):
-        idx = self._wav_idx
-        self._wav_raw[idx] = ir_val
-        self._wav_idx = (idx + 1) % _DISP_W
-
-        # Incremental min/max update
-        if ir_val > self._wav_raw_max:
-            self._wav_raw_max = ir_val
-        if ir_val < self._wav_raw_min:
-            self._wav_raw_min = ir_val
-
-        # Periodic full recompute to evict stale extremes after amplitude changes
-        self._norm_ctr += 1
-        if self._norm_ctr >= _NORM_RECOMPUTE_INTERVAL:
-            self._norm_ctr = 0
-            mn = 0x7FFFFFFF
-            mx = 0
-            for v in self._wav_raw:
-                if v < mn: mn = v
-                if v > mx: mx = v
-            self._wav_raw_min = mn
-            self._wav_raw_max = mx
-
-        rng = self._wav_raw_max - self._wav_raw_min
-        if rng == 0:
-            y_norm = _WAV_H // 2
-            self._quality = 0
-        else:
-            y_norm = ((ir_val - self._wav_raw_min) * (_WAV_H - 1)) // rng
-            if y_norm < 0:
-                y_norm = 0
-            elif y_norm > _WAV_H - 1:
-                y_norm = _WAV_H - 1
-            if self._wav_raw_max > 0:
-                self._quality = min((rng * 10 * 100) // self._wav_raw_max, 100)
-            else:
-                self._quality = 0
-
-        self._wav_y[idx] = y_norm
+        raw = self._wav_raw
+        seq = self._wav_seq
+        raw[seq & _DISP_MASK] = ir_val
+        self._wav_seq = (seq + 1) & _WAV_SEQ_MASK
+
+        # Sliding-window min/max via monotonic deques of sample numbers (values
+        # are read back from raw). The slot just overwritten held sample
+        # seq - _DISP_W, so that one leaves the window first.
+        gone = (seq - _DISP_W) & _WAV_SEQ_MASK
+
+        dq = self._wav_min_dq
+        h  = self._wav_min_head
+        n  = self._wav_min_len
+        if n and dq[h] == gone:
+            h = (h + 1) & _DISP_MASK
+            n -= 1
+        while n and raw[dq[(h + n - 1) & _DISP_MASK] & _DISP_MASK] >= ir_val:
+            n -= 1
+        dq[(h + n) & _DISP_MASK] = seq
+        self._wav_min_head = h
+        self._wav_min_len  = n + 1
+
+        dq = self._wav_max_dq
+        h  = self._wav_max_head
+        n  = self._wav_max_len
+        if n and dq[h] == gone:
+            h = (h + 1) & _DISP_MASK
+            n -= 1
+        while n and raw[dq[(h + n - 1) & _DISP_MASK] & _DISP_MASK] <= ir_val:
+            n -= 1
+        dq[(h + n) & _DISP_MASK] = seq
+        self._wav_max_head = h
+        self._wav_max_len  = n + 1
 
     # ------------------------------------------------------------------ #
 
     def _compute_vitals(self):
         self._bpm = self._hr.calculate_heart_rate()
         self._compute_spo2()
+        # Derive the display strings and beat timing once per compute rather
+        # than on every frame
+        self._beat_ms       = (60000 // self._bpm) if self._bpm else _BEAT_DEFAULT_MS
+        self._beat_large_ms = self._beat_ms // 4
+        self._bpm_str  = ("{:3d} BPM".format(self._bpm)  if self._bpm  is not None
+                          else _BPM_NONE_STR)
+        self._spo2_str = ("{:3d} %".format(self._spo2)   if self._spo2 is not None
+                          else _SPO2_NONE_STR)
 
     def _compute_spo2(self):
-        n = self._spo2_count
-        if n < 4:
+        # Wait until the shared window holds only finger samples
+        if self._spo2_count < _IR_WINDOW:
             self._spo2 = None
             return
 
-        ir_buf  = self._spo2_ir_buf
-        red_buf = self._spo2_red_buf
-
-        ir_sum  = 0
-        red_sum = 0
-        ir_min  = ir_buf[0];   ir_max  = ir_buf[0]
-        red_min = red_buf[0];  red_max = red_buf[0]
-        for i in range(n):
-            iv = ir_buf[i];  rv = red_buf[i]
-            ir_sum  += iv;   red_sum += rv
-            if iv < ir_min:  ir_min  = iv
-            if iv > ir_max:  ir_max  = iv
-            if rv < red_min: red_min = rv
-            if rv > red_max: red_max = rv
-
-        dc_ir  = ir_sum  // n
-        dc_red = red_sum // n
-        ac_ir  = ir_max  - ir_min
-        ac_red = red_max - red_min
+        st = self._spo2_stats
+        _spo2_stats(self._ir_window_buf, self._red_window_buf, _IR_WINDOW, st)
+
+        dc_ir  = self._ir_window_sum // _IR_WINDOW
+        dc_red = st[0] // _IR_WINDOW
+        ac_ir  = st[2] - st[1]
+        ac_red = st[4] - st[3]
 
         # Right-shift by 3 to keep products within int32 range
         dc_ir_s  = dc_ir  >> 3
@@ -394,51 +563,42 @@ class HeartVitalsDisplay:
 
             # --- Header (y=0–15) ---
             # Heart beat animation
-            beat_ms = (60000 // self._bpm) if self._bpm else 600
             elapsed = ticks_diff(now, self._beat_ref_ms)
-            if elapsed >= beat_ms:
+            if elapsed >= self._beat_ms:
                 self._beat_ref_ms = now
                 elapsed = 0
-            heart_bmp = _HEART_LARGE if elapsed < (beat_ms // 4) else _HEART_SMALL
+            heart_bmp = _HEART_LARGE if elapsed < self._beat_large_ms else _HEART_SMALL
             display.draw_bitmap(0, 0, heart_bmp, _HEART_SIZE, _HEART_SIZE)
 
             # BPM on top line, SpO2 on bottom line of header
-            bpm_str  = ("{:3d} BPM".format(self._bpm)  if self._bpm  is not None
-                        else "--- BPM")
-            spo2_str = ("{:3d} %".format(self._spo2)   if self._spo2 is not None
-                        else " -- %")
-            display.text(bpm_str,  18, 0)
-            display.text(spo2_str, 18, 8)
+            display.text(self._bpm_str,  18, 0)
+            display.text(self._spo2_str, 18, 8)
 
             # --- Separators ---
             display.hline(0, 16, _DISP_W, 1)
             display.hline(0, 55, _DISP_W, 1)
 
             # --- Waveform (y=17–54), right-to-left scrolling ---
-            wav    = self._wav_y
-            w_idx  = self._wav_idx
-            bot    = _WAV_TOP + _WAV_H - 1          # y=54
-            ri     = w_idx % _DISP_W                 # oldest sample
-            prev_y = bot - wav[ri]
-            for x in range(1, _DISP_W):
-                ri    = (w_idx + x) % _DISP_W
-                cur_y = bot - wav[ri]
-                if cur_y == prev_y:
-                    display.pixel(x, cur_y, 1)
-                else:
-                    y0 = cur_y  if cur_y  < prev_y else prev_y
-                    h  = (prev_y - cur_y) if prev_y > cur_y else (cur_y - prev_y)
-                    display.vline(x, y0, h + 1, 1)
-                prev_y = cur_y
+            raw = self._wav_raw
+            mn  = raw[self._wav_min_dq[self._wav_min_head] & _DISP_MASK]
+            mx  = raw[self._wav_max_dq[self._wav_max_head] & _DISP_MASK]
+            rng = mx - mn
+            params    = self._wav_params
+            params[0] = self._wav_seq & _DISP_MASK    # oldest sample
+            params[1] = mn
+            params[2] = rng
+            _draw_wav(display.buffer, raw, params)
 
             # --- Status bar (y=56–63) ---
             # Elapsed time since finger placement
             elapsed_s = ticks_diff(now, self._finger_start_ms) // 1000
             display.text("{:3d}s".format(elapsed_s), 0, _STATUS_Y)
 
-            # Quality bar: outline at x=34, 94px wide, 8px tall
+            # Quality bar: outline at x=34, 94px wide, 8px tall; fill is the
+            # waveform's peak-to-peak range relative to its maximum
             display.rect(34, _STATUS_Y, 94, 8, 1)
-            fill_w = self._quality * 92 // 100
+            quality = min((rng * 10 * 100) // mx, 100) if rng > 0 else 0
+            fill_w  = quality * 92 // 100
             if fill_w > 0:
                 display.fill_rect(35, _STATUS_Y + 1, fill_w, 6, 1)
 
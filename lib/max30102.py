@@ -1,5 +1,5 @@
+import micropython
 from machine import I2C, SoftI2C
-from array import array
 from utime import sleep_ms
 
 # Register addresses
@@ -48,13 +48,22 @@ _RESET_BIT    = 0x40
 _SHUTDOWN_BIT = 0x80
 _ROLLOVER_BIT = 0x10
 _EXPECTED_ID  = 0x15
-_BUF_SIZE     = 16
+_BUF_SIZE     = 16    # power of two: ring indices wrap with _BUF_MASK
+_BUF_MASK     = _BUF_SIZE - 1
+_FIFO_DEPTH   = 32    # on-chip FIFO slots
 
 # Slot device codes
 _SLOT_RED = 0x01
 _SLOT_IR  = 0x02
 
 
+@micropython.viper
+def _decode18(buf: ptr8, i: int) -> int:
+    """Decode the i-th packed 3-byte FIFO word in buf as an 18-bit count."""
+    j = i * 3
+    return ((buf[j] << 16) | (buf[j + 1] << 8) | buf[j + 2]) & 0x3FFFF
+
+
 class MAX30102:
     def __init__(self, i2c, addr=0x57):
         self._i2c = i2c
@@ -62,11 +71,29 @@ class MAX30102:
         self._active_leds = 0
         self._bytes_per_sample = 0
 
-        # Pre-allocated ring buffers (red, IR)
-        self._red = array('l', [0] * _BUF_SIZE)
-        self._ir  = array('l', [0] * _BUF_SIZE)
+        # Pre-allocated ring buffers (red, IR) holding the raw 3-byte FIFO
+        # words; samples are decoded by _decode18() when popped
+        self._red_bytes = bytearray(3 * _BUF_SIZE)
+        self._ir_bytes  = bytearray(3 * _BUF_SIZE)
         self._head = 0
         self._tail = 0
+        self._last_ir = 0   # newest IR count read by check()
+
+        # Scratch for single-register access and the FIFO pointer block
+        # (WR_PTR, OVF_COUNTER, RD_PTR are consecutive registers)
+        self._reg_buf = bytearray(1)
+        self._ptr_buf = bytearray(3)
+
+        # Shadow of the configuration registers (0x00..0x21) as last written.
+        # The sensor keeps its registers across a Pico reboot, so the shadow
+        # is only trusted once soft_reset() has put every register back to
+        # 0x00; until then _bitmask() reads the device first
+        self._shadow = bytearray(_REG_TEMP_CFG + 1)
+        self._shadow_synced = False
+
+        # Burst-read buffer large enough for a full FIFO of 3-LED samples
+        self._fifo_buf = bytearray(_FIFO_DEPTH * 9)
+        self._fifo_mv  = memoryview(self._fifo_buf)
 
     # ---- public API --------------------------------------------------------
 
@@ -92,56 +119,90 @@ class MAX30102:
             v = self._read_reg(_REG_MODE_CFG)
             if not (v & _RESET_BIT):
                 break
+        # All registers are back at their power-on value
+        shadow = self._shadow
+        for i in range(len(shadow)):
+            shadow[i] = 0
+        self._shadow_synced = True
 
+    @micropython.native
     def check(self):
-        rd = self._read_reg(_REG_FIFO_RD_PTR)
-        wr = self._read_reg(_REG_FIFO_WR_PTR)
+        ptrs = self._ptr_buf
+        self._i2c.readfrom_mem_into(self._addr, _REG_FIFO_WR_PTR, ptrs)
+        wr = ptrs[0]
+        rd = ptrs[2]
         if rd == wr:
             return False
 
         n = (wr - rd) & 0x1F  # 32-slot circular pointer
-        for _ in range(n):
-            raw = self._read_fifo_sample()
-            # Decode RED (bytes 0-2)
-            red_val = (raw[0] << 16 | raw[1] << 8 | raw[2]) & 0x3FFFF
-            h = self._head
-            self._red[h] = red_val
-            if self._active_leds > 1:
-                ir_val = (raw[3] << 16 | raw[4] << 8 | raw[5]) & 0x3FFFF
-                self._ir[h] = ir_val
-            self._head = (h + 1) % _BUF_SIZE
+        bps = self._bytes_per_sample
+
+        # The FIFO data register auto-advances, so all n samples come out of
+        # a single burst read
+        self._i2c.readfrom_mem_into(self._addr, _REG_FIFO_DATA,
+                                    self._fifo_mv[:n * bps])
+
+        raw    = self._fifo_buf
+        red_b  = self._red_bytes
+        ir_b   = self._ir_bytes
+        two_ch = self._active_leds > 1
+        # Ring indices live in locals for the whole burst, stored back once
+        h = self._head
+        t = self._tail
+        for k in range(0, n * bps, bps):
+            # Copy RED (bytes 0-2) and IR (bytes 3-5) words as-is
+            o = h * 3
+            red_b[o]     = raw[k]
+            red_b[o + 1] = raw[k + 1]
+            red_b[o + 2] = raw[k + 2]
+            if two_ch:
+                ir_b[o]     = raw[k + 3]
+                ir_b[o + 1] = raw[k + 4]
+                ir_b[o + 2] = raw[k + 5]
+            h = (h + 1) & _BUF_MASK
             # If head catches tail, advance tail (drop oldest)
-            if self._head == self._tail:
-                self._tail = (self._tail + 1) % _BUF_SIZE
+            if h == t:
+                t = (t + 1) & _BUF_MASK
+        self._head = h
+        self._tail = t
+        self._last_ir = _decode18(ir_b, (h - 1) & _BUF_MASK)
         return True
 
+    @micropython.native
     def available(self):
-        return (self._head - self._tail) % _BUF_SIZE
+        return (self._head - self._tail) & _BUF_MASK
 
+    @micropython.native
     def pop_sample(self):
         """Pop one (red, ir) pair from the ring buffer."""
         if self._head == self._tail:
             return 0, 0
         t = self._tail
-        red = self._red[t]
-        ir = self._ir[t]
-        self._tail = (t + 1) % _BUF_SIZE
+        red = _decode18(self._red_bytes, t)
+        ir = _decode18(self._ir_bytes, t)
+        self._tail = (t + 1) & _BUF_MASK
         return red, ir
 
+    @micropython.native
     def pop_ir_from_storage(self):
         if self._head == self._tail:
             return 0
-        val = self._ir[self._tail]
-        self._tail = (self._tail + 1) % _BUF_SIZE
+        val = _decode18(self._ir_bytes, self._tail)
+        self._tail = (self._tail + 1) & _BUF_MASK
         return val
 
+    @micropython.native
     def pop_red_from_storage(self):
         if self._head == self._tail:
             return 0
-        val = self._red[self._tail]
-        self._tail = (self._tail + 1) % _BUF_SIZE
+        val = _decode18(self._red_bytes, self._tail)
+        self._tail = (self._tail + 1) & _BUF_MASK
         return val
 
+    def flush(self):
+        """Discard all buffered samples."""
+        self._tail = self._head
+
     def check_part_id(self):
         return self._read_reg(_REG_PART_ID) == _EXPECTED_ID
 
@@ -155,9 +216,14 @@ class MAX30102:
         return float(t_int) + float(t_frac) * 0.0625
 
     def check_finger(self, threshold=10000):
-        self.check()
-        ir = self.pop_ir_from_storage()
-        return ir > threshold
+        """True if the newest IR sample read by check() exceeds threshold.
+
+        No I2C traffic and no sample is consumed; call check() to refresh.
+        Samples keep accumulating in the ring meanwhile, so callers that
+        only poll this must drain the ring or flush() it themselves before
+        reading samples.
+        """
+        return self._last_ir > threshold
 
     # ---- private configuration methods -------------------------------------
 
@@ -216,17 +282,23 @@ class MAX30102:
 
     # ---- low-level I2C helpers ---------------------------------------------
 
-    def _read_reg(self, reg, n=1):
-        self._i2c.writeto(self._addr, bytearray([reg]))
-        data = self._i2c.readfrom(self._addr, n)
-        return data[0] if n == 1 else data
+    def _read_reg(self, reg):
+        buf = self._reg_buf
+        self._i2c.readfrom_mem_into(self._addr, reg, buf)
+        return buf[0]
 
     def _write_reg(self, reg, val):
-        self._i2c.writeto(self._addr, bytearray([reg, val]))
+        buf = self._reg_buf
+        buf[0] = val
+        self._i2c.writeto_mem(self._addr, reg, buf)
+        if reg < len(self._shadow):
+            self._shadow[reg] = val
 
     def _bitmask(self, reg, mask, bits):
-        cur = self._read_reg(reg)
-        self._write_reg(reg, (cur & mask) | bits)
-
-    def _read_fifo_sample(self):
-        return self._read_reg(_REG_FIFO_DATA, self._bytes_per_sample)
+        # Read-modify-write against the shadow after a soft reset: one I2C
+        # write, no read. Before that the register is read from the device
+        if self._shadow_synced:
+            val = self._shadow[reg]
+        else:
+            val = self._read_reg(reg)
+        self._write_reg(reg, (val & mask) | bits)
@@ -7,15 +7,40 @@ Compatible with: Raspberry Pi Pico and other MicroPython boards
 """
 
 import framebuf
+import micropython
 import time
+from array import array
+
+# Control byte announcing display RAM data
+_CTRL_DATA = b'\x40'
+# Control byte for a single command with more control bytes to follow
+_CTRL_CMD_CONT = 0x80
+# draw_bitmap() wrappers kept for bytes bitmaps; the cache is emptied when
+# full, so bitmaps built at runtime cannot grow it without bound
+_BITMAP_CACHE_SIZE = 4
+
+
+@micropython.viper
+def _sync_page(buf: ptr8, prev: ptr8, start: int, n: int) -> int:
+    """Copy buf[start:start+n] into prev; return 1 if any byte differed."""
+    changed = 0
+    for i in range(start, start + n):
+        v = buf[i]
+        if v != prev[i]:
+            prev[i] = v
+            changed = 1
+    return changed
 
 
 class SH1106:
     """
     SH1106 OLED Display Driver
 
-    This driver inherits from framebuf.FrameBuffer to provide
-    drawing primitives like text, lines, rectangles, etc.
+    Drawing goes to a framebuf.FrameBuffer over the display buffer.
+    fill, pixel, text, scroll and blit are that FrameBuffer's own bound
+    methods, so a call reaches C without a Python forwarding frame;
+    line, hline, vline, rect and fill_rect keep wrappers for their
+    color=1 default.
     """
 
     # SH1106 Commands
@@ -74,6 +99,52 @@ class SH1106:
             self.buffer, self.width, self.height, framebuf.MONO_VLSB
         )
 
+        # Primitives with the same signature as framebuf are bound directly:
+        # one instance lookup per call, no forwarding frame
+        fb = self.framebuf
+        self.fill = fb.fill
+        self.pixel = fb.pixel
+        self.text = fb.text
+        self.scroll = fb.scroll
+        self.blit = fb.blit
+        self._rect = fb.rect
+        self._frect = fb.fill_rect
+
+        # C shape primitives (MicroPython 1.20+); older firmware falls back to
+        # the Python implementations below
+        self._has_ellipse = hasattr(self.framebuf, 'ellipse')
+        self._has_poly = hasattr(self.framebuf, 'poly')
+        self._tri = array('h', [0] * 6)
+
+        # draw_bitmap(): FrameBuffer wrappers of immutable bitmaps, and a
+        # palette swapping 0/1 for drawing in color 0
+        self._bitmaps = {}
+        self._inv_palette = framebuf.FrameBuffer(bytearray(1), 2, 1, framebuf.MONO_HLSB)
+        self._inv_palette.pixel(0, 0, 1)
+
+        # Copy of the buffer as last sent, to skip unchanged pages in show().
+        # Display RAM is undefined until the first show(), which sends all
+        self._prev = bytearray(self.width * self.pages)
+        self._full_refresh = True
+
+        # Reusable single-command transfer: control byte 0x00 + command
+        self._cmd_buf = bytearray(2)
+
+        # Per-page writevto() vectors: the page and column address commands,
+        # each behind a continuation control byte (Co=1), then the data
+        # control byte and a view of that page of the buffer. Commands and
+        # data go out in a single transaction per page
+        mv = memoryview(self.buffer)
+        col_low = self.CMD_SET_LOW_COLUMN | (self.column_offset & 0x0F)
+        col_high = self.CMD_SET_HIGH_COLUMN | (self.column_offset >> 4)
+        self._page_data = [
+            (bytes((_CTRL_CMD_CONT, self.CMD_SET_PAGE_ADDR | page,
+                    _CTRL_CMD_CONT, col_low,
+                    _CTRL_CMD_CONT, col_high)) + _CTRL_DATA,
+             mv[page * self.width:(page + 1) * self.width])
+            for page in range(self.pages)
+        ]
+
         # Initialize display
         self._init_display()
 
@@ -99,75 +170,60 @@ class SH1106:
             self.CMD_DISPLAY_ON,
         ]
 
-        for cmd in init_sequence:
-            self._write_cmd(cmd)
+        # A single 0x00 control byte followed by the whole sequence
+        self.i2c.writeto(self.addr, bytes([0x00] + init_sequence))
 
         self.fill(0)
         self.show()
 
     def _write_cmd(self, cmd):
         """Write a command to the display."""
-        self.i2c.writeto(self.addr, bytes([0x00, cmd]))
-
-    def _write_data(self, data):
-        """Write data to the display."""
-        self.i2c.writeto(self.addr, bytes([0x40]) + data)
+        buf = self._cmd_buf
+        buf[1] = cmd
+        self.i2c.writeto(self.addr, buf)
 
     def show(self):
         """
         Update the display with the contents of the frame buffer.
 
         SH1106 doesn't support horizontal addressing mode across pages,
-        so we need to update page by page.
+        so we need to update page by page: one transaction per page
+        carrying the address commands and the page data. Pages unchanged
+        since the last show() are skipped.
         """
-        for page in range(self.pages):
-            # Set page address
-            self._write_cmd(self.CMD_SET_PAGE_ADDR | page)
-            # Set column address (with offset for SH1106)
-            self._write_cmd(self.CMD_SET_LOW_COLUMN | (self.column_offset & 0x0F))
-            self._write_cmd(self.CMD_SET_HIGH_COLUMN | (self.column_offset >> 4))
+        self.show_pages(0, self.pages)
 
-            # Write page data
-            start = page * self.width
-            end = start + self.width
-            self._write_data(self.buffer[start:end])
-
-    def fill(self, color):
+    def show_pages(self, start, end):
         """
-        Fill the entire display with a color.
+        Update only pages start..end-1 (rows 8*start to 8*end-1).
 
-        Args:
-            color: 0 for black, 1 for white
-        """
-        self.framebuf.fill(color)
-
-    def pixel(self, x, y, color=None):
-        """
-        Get or set a pixel.
+        For callers that know which rows they drew into: the other pages
+        are neither compared nor sent. Within the range, unchanged pages
+        are still skipped. Until the first full show() has been sent,
+        every page is sent.
 
         Args:
-            x: X coordinate
-            y: Y coordinate
-            color: If None, returns pixel value. Otherwise sets pixel.
-
-        Returns:
-            Pixel value if color is None
-        """
-        if color is None:
-            return self.framebuf.pixel(x, y)
-        self.framebuf.pixel(x, y, color)
-
-    def text(self, string, x, y, color=1):
-        """
-        Draw text on the display.
-
-        Args:
-            string: Text to display
-            x: X coordinate
-            y: Y coordinate
-            color: 0 for black, 1 for white
-        """
-        self.framebuf.text(string, x, y, color)
+            start: First page (0-7)
+            end: Page after the last one to update (1-8)
+        """
+        i2c = self.i2c
+        addr = self.addr
+        buf = self.buffer
+        prev = self._prev
+        width = self.width
+        page_data = self._page_data
+        full = self._full_refresh
+        if full:
+            start = 0
+            end = self.pages
+            self._full_refresh = False
+        for page in range(start, end):
+            if not _sync_page(buf, prev, page * width, width) and not full:
+                continue
+
+            # Page and column address (with offset for SH1106), then the
+            # page data straight from the framebuffer, no copy
+            i2c.writevto(addr, page_data[page])
 
     def line(self, x0, y0, x1, y1, color=1):
         """
@@ -214,9 +270,9 @@ class SH1106:
             fill: If True, fill the rectangle
         """
         if fill:
-            self.framebuf.fill_rect(x, y, width, height, color)
+            self._frect(x, y, width, height, color)
         else:
-            self.framebuf.rect(x, y, width, height, color)
+            self._rect(x, y, width, height, color)
 
     def fill_rect(self, x, y, width, height, color=1):
         """
@@ -228,29 +284,19 @@ class SH1106:
             height: Rectangle height
             color: 0 for black, 1 for white
         """
-        self.framebuf.fill_rect(x, y, width, height, color)
-
-    def scroll(self, dx, dy):
-        """
-        Scroll the display contents.
+        self._frect(x, y, width, height, color)
 
-        Args:
-            dx: Horizontal scroll amount
-            dy: Vertical scroll amount
+    def start_line(self, line):
         """
-        self.framebuf.scroll(dx, dy)
+        Set the display RAM row shown at the top of the screen.
 
-    def blit(self, fbuf, x, y, key=-1, palette=None):
-        """
-        Copy a framebuffer to the display.
+        The SH1106's hardware vertical scroll: the picture wraps around
+        without touching the frame buffer or resending any page.
 
         Args:
-            fbuf: Source framebuffer
-            x, y: Destination coordinates
-            key: Transparent color key (-1 for none)
-            palette: Color palette
+            line: RAM row 0-63 (0 = normal)
         """
-        self.framebuf.blit(fbuf, x, y, key, palette)
+        self._write_cmd(self.CMD_SET_START_LINE | (line & 0x3F))
 
     def contrast(self, value):
         """
@@ -300,7 +346,8 @@ class SH1106:
 
     def circle(self, x0, y0, radius, color=1, fill=False):
         """
-        Draw a circle using Bresenham's algorithm.
+        Draw a circle with framebuf.ellipse, or Bresenham's algorithm on
+        firmware without it.
 
         Args:
             x0, y0: Center coordinates
@@ -308,7 +355,9 @@ class SH1106:
             color: 0 for black, 1 for white
             fill: If True, fill the circle
         """
-        if fill:
+        if self._has_ellipse:
+            self.framebuf.ellipse(x0, y0, radius, radius, color, fill)
+        elif fill:
             self._fill_circle(x0, y0, radius, color)
         else:
             self._draw_circle(x0, y0, radius, color)
@@ -362,7 +411,16 @@ class SH1106:
             color: 0 for black, 1 for white
             fill: If True, fill the triangle
         """
-        if fill:
+        if self._has_poly:
+            tri = self._tri
+            tri[0] = x0
+            tri[1] = y0
+            tri[2] = x1
+            tri[3] = y1
+            tri[4] = x2
+            tri[5] = y2
+            self.framebuf.poly(0, 0, tri, color, fill)
+        elif fill:
             self._fill_triangle(x0, y0, x1, y1, x2, y2, color)
         else:
             self.line(x0, y0, x1, y1, color)
@@ -398,20 +456,44 @@ class SH1106:
         """
         Draw a bitmap image.
 
+        MSB-first rows are framebuf's MONO_HLSB layout, so the bitmap is
+        wrapped in a FrameBuffer and blitted with its 0 bits transparent.
+        Wrappers for the last few bytes bitmaps are cached, so icons are only
+        copied once; bitmaps generated per frame should be passed as a
+        prebuilt framebuf.FrameBuffer instead.
+
         Args:
             x, y: Top-left coordinates
-            bitmap: Bytearray of bitmap data (MSB first)
+            bitmap: Bitmap data (MSB first) as bytes, bytearray or any
+                sequence of ints, or a MONO_HLSB framebuf.FrameBuffer
             width: Bitmap width
             height: Bitmap height
             color: 0 for black, 1 for white
         """
-        byte_width = (width + 7) // 8
-        for j in range(height):
-            for i in range(width):
-                byte_idx = j * byte_width + i // 8
-                bit_idx = 7 - (i % 8)
-                if bitmap[byte_idx] & (1 << bit_idx):
-                    self.pixel(x + i, y + j, color)
+        if isinstance(bitmap, framebuf.FrameBuffer):
+            src = bitmap
+        elif isinstance(bitmap, bytes):
+            key = (bitmap, width, height)
+            cache = self._bitmaps
+            src = cache.get(key)
+            if src is None:
+                if len(cache) >= _BITMAP_CACHE_SIZE:
+                    cache.clear()
+                src = framebuf.FrameBuffer(bytearray(bitmap), width, height,
+                                           framebuf.MONO_HLSB)
+                cache[key] = src
+        else:
+            # FrameBuffer needs a writable buffer: copy lists, tuples and
+            # read-only memoryviews
+            if not isinstance(bitmap, bytearray):
+                bitmap = bytearray(bitmap)
+            src = framebuf.FrameBuffer(bitmap, width, height, framebuf.MONO_HLSB)
+
+        if color:
+            self.blit(src, x, y, 0)
+        else:
+            # Palette maps set bits to 0 and clear bits to the key colour 1
+            self.blit(src, x, y, 1, self._inv_palette)
 
     def clear(self):
         """Clear the display (fill with black)."""
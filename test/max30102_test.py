@@ -1,10 +1,73 @@
+import micropython
 import time
+from array import array
 from machine import I2C, Pin
 from utime import ticks_diff, ticks_ms
 
 from max30102 import MAX30102, LED_AMP_MEDIUM
 
 
+@micropython.viper
+def _sum_max(ring: ptr32, n: int, out: ptr32):
+    """Write the sum and the maximum of ring[0:n] to out[0] and out[1]."""
+    total = 0
+    top   = ring[0]
+    for i in range(n):
+        v      = ring[i]
+        total += v
+        if v > top:
+            top = v
+    out[0] = total
+    out[1] = top
+
+
+@micropython.viper
+def _detect_peaks(ring: ptr32, ts: ptr32, out: ptr32, p: ptr32) -> int:
+    """Collect peak timestamps from the smoothed ring, oldest → newest.
+
+    p holds [oldest slot, filled, ring size, level, refractory ms, out
+    capacity]. A peak is a rise followed by a fall whose top is above
+    level; a flat top is timed at its first sample. Peaks closer than the
+    refractory period are dropped. Returns the number of timestamps
+    written to out.
+    """
+    j        = p[0]
+    n        = p[1]
+    size     = p[2]
+    level    = p[3]
+    min_dist = p[4]
+    cap      = p[5]
+
+    count = 0
+    last  = ts[j] - min_dist * 2  # allow first peak
+    up    = 0
+    apex  = j
+    v     = ring[j]
+    for _ in range(n - 1):
+        j += 1
+        if j == size:
+            j = 0
+        nxt = ring[j]
+        # Slope sign change: one compare per sample, level checked only
+        # at the turning points
+        if nxt > v:
+            up   = 1
+            apex = j
+        elif nxt < v:
+            if up and v > level:
+                t = ts[apex]
+                # ticks_diff() for the 2**30 ticks period, in machine ints
+                if ((t - last + 0x20000000) & 0x3FFFFFFF) - 0x20000000 >= min_dist:
+                    out[count] = t
+                    count += 1
+                    last = t
+                    if count == cap:
+                        break
+            up = 0
+        v = nxt
+    return count
+
+
 class HeartRateMonitor:
     """Heart rate monitor with DC removal, refractory period, physiological
     clamping, and median output filtering."""
@@ -12,6 +75,8 @@ class HeartRateMonitor:
     MIN_BPM = 40
     MAX_BPM = 200
     MIN_PEAK_DISTANCE_MS = 300
+    MIN_INTERVAL_MS = 60000 // MAX_BPM
+    MAX_INTERVAL_MS = 60000 // MIN_BPM
 
     def __init__(self, sample_rate=50, window_size=250, smoothing_window=15,
                  bpm_buffer_size=5):
@@ -20,112 +85,156 @@ class HeartRateMonitor:
         self.smoothing_window = smoothing_window
         self.bpm_buffer_size = bpm_buffer_size
 
-        self._samples = [0] * window_size
-        self._timestamps = [0] * window_size
+        # Typed rings: no per-element objects, no boxing on store. Samples are
+        # stored already smoothed (trailing moving average, see add_sample)
+        self._smoothed = array('i', [0] * window_size)
+        self._timestamps = array('i', [0] * window_size)
         self._n = 0
 
-        self._smooth_buf = [0] * smoothing_window
+        self._smooth_buf = array('i', [0] * smoothing_window)
         self._smooth_idx = 0
         self._smooth_sum = 0
         self._smooth_count = 0
 
-        self._bpm_buf = [0.0] * bpm_buffer_size
+        self._bpm_buf = array('f', [0.0] * bpm_buffer_size)
         self._bpm_count = 0
 
+        # Peak timestamps: the refractory period bounds how many fit in one
+        # window
+        max_peaks = (window_size * 1000) // (sample_rate * self.MIN_PEAK_DISTANCE_MS) + 2
+        self._peaks_ts = array('i', [0] * max_peaks)
+        # _detect_peaks() parameters: oldest slot, filled, ring size, level,
+        # refractory ms, peak capacity
+        self._peak_params = array('i', [0, 0, window_size, 0,
+                                        self.MIN_PEAK_DISTANCE_MS, max_peaks])
+        # _sum_max() results: sum, maximum
+        self._stats = array('i', [0, 0])
+
     @staticmethod
     def _median(lst, n):
-        tmp = sorted(lst[:n])
-        mid = n // 2
-        if n % 2 == 1:
-            return tmp[mid]
-        return (tmp[mid - 1] + tmp[mid]) / 2
-
-    def _buf_get(self, buf, age):
-        return buf[(self._n - 1 - age) % self.window_size]
+        # Compare-and-swap selection for the usual n <= 5 (no slice, no
+        # sort); larger buffers fall back to sorted()
+        if n > 5:
+            tmp = sorted(lst[:n])
+            mid = n // 2
+            if n % 2 == 1:
+                return tmp[mid]
+            return (tmp[mid - 1] + tmp[mid]) / 2
+        a = lst[0]
+        if n == 1:
+            return a
+        b = lst[1]
+        if a > b:
+            a, b = b, a
+        if n == 2:
+            return (a + b) / 2
+        c = lst[2]
+        if n == 3:
+            return max(a, min(b, c))
+        d = lst[3]
+        if c > d:
+            c, d = d, c
+        if n == 4:
+            return (max(a, c) + min(b, d)) / 2
+        # n == 5: drop the smaller pair minimum (below three others), then
+        # the median is the second smallest of the remaining four
+        if a > c:
+            a, b, c, d = c, d, a, b
+        e = lst[4]
+        if b > e:
+            b, e = e, b
+        if b < c:
+            return min(e, c)
+        return min(b, d)
 
     def reset(self):
-        for i in range(self.window_size):
-            self._samples[i] = 0
-            self._timestamps[i] = 0
+        # The sample, timestamp and BPM arrays are only read up to _n and
+        # _bpm_count, so resetting the counters is enough. The smoothing
+        # window must be zeroed: add_sample() subtracts the slot it replaces
         self._n = 0
+        buf = self._smooth_buf
         for i in range(self.smoothing_window):
-            self._smooth_buf[i] = 0
+            buf[i] = 0
         self._smooth_idx = 0
         self._smooth_sum = 0
         self._smooth_count = 0
-        for i in range(self.bpm_buffer_size):
-            self._bpm_buf[i] = 0.0
         self._bpm_count = 0
 
+    @micropython.native
     def add_sample(self, sample):
         ts = ticks_ms()
+
+        # Running sum: add the entering sample, subtract the one it replaces.
+        # State is read into locals once and the slot wraps by compare
+        window = self.smoothing_window
+        buf = self._smooth_buf
+        i = self._smooth_idx
+        acc = self._smooth_sum + sample - buf[i]
+        buf[i] = sample
+        i += 1
+        if i == window:
+            i = 0
+        self._smooth_idx = i
+        self._smooth_sum = acc
+        count = self._smooth_count
+        if count < window:
+            count += 1
+            self._smooth_count = count
+
+        # Trailing average: a constant delay of half a window, which shifts
+        # every peak equally and leaves the intervals unchanged
         idx = self._n % self.window_size
-        self._samples[idx] = sample
+        self._smoothed[idx] = acc // count
         self._timestamps[idx] = ts
         self._n += 1
 
-        old = self._smooth_buf[self._smooth_idx]
-        self._smooth_buf[self._smooth_idx] = sample
-        self._smooth_sum += sample - old
-        self._smooth_idx = (self._smooth_idx + 1) % self.smoothing_window
-        if self._smooth_count < self.smoothing_window:
-            self._smooth_count += 1
-
     def calculate_heart_rate(self):
         filled = min(self._n, self.window_size)
         if filled < self.smoothing_window + 2:
             return None
 
-        sig_len = filled
-        sig = [0] * sig_len
-        ts = [0] * sig_len
-
-        for i in range(sig_len):
-            age = sig_len - 1 - i
-            ts[i] = self._buf_get(self._timestamps, age)
-            half = self.smoothing_window // 2
-            acc = 0
-            count = 0
-            for j in range(-half, half + 1):
-                a = age + j
-                if 0 <= a < filled:
-                    acc += self._buf_get(self._samples, a)
-                    count += 1
-            sig[i] = acc / count if count else 0
-
-        mean = sum(sig) / sig_len
-        for i in range(sig_len):
-            sig[i] -= mean
-
-        max_val = max(sig)
-        threshold = max_val * 0.3 if max_val > 0 else 0
-
-        peaks_ts = []
-        last_peak_ts = -self.MIN_PEAK_DISTANCE_MS * 2
-
-        for i in range(1, sig_len - 1):
-            if (sig[i] > threshold
-                    and sig[i] > sig[i - 1]
-                    and sig[i] > sig[i + 1]):
-                t = ts[i]
-                if ticks_diff(t, last_peak_ts) >= self.MIN_PEAK_DISTANCE_MS:
-                    peaks_ts.append(t)
-                    last_peak_ts = t
-
-        if len(peaks_ts) < 2:
+        smoothed = self._smoothed
+        timestamps = self._timestamps
+        size = self.window_size
+
+        # Pass 1 (viper): sum and maximum. Order does not matter here, so
+        # the filled slots are walked directly
+        stats = self._stats
+        _sum_max(smoothed, filled, stats)
+        mean = stats[0] / filled
+        top = stats[1]
+
+        # Peaks above 30% of the positive excursion. Compare against
+        # mean + threshold so the mean never has to be subtracted per sample.
+        # The maximum is never below the mean, so the excursion needs no clamp
+        level = mean + (top - mean) * 0.3
+
+        # Pass 2 (viper): stream the ring once, tracking the slope sign;
+        # rise-to-fall turning points above level are peaks
+        peaks_ts = self._peaks_ts
+        p = self._peak_params
+        p[0] = (self._n - filled) % size
+        p[1] = filled
+        # int() truncates toward zero, and level >= mean >= 0 for raw counts,
+        # so int() floors here: v > level <=> v > int(level) for integer v.
+        # A signed (e.g. DC-removed) signal would need floor() instead
+        p[3] = int(level)
+        n_peaks = _detect_peaks(smoothed, timestamps, peaks_ts, p)
+
+        tdiff = ticks_diff
+
+        if n_peaks < 2:
             if self._bpm_count == 0:
                 return None
             n = min(self._bpm_count, self.bpm_buffer_size)
             return self._median(self._bpm_buf, n)
 
-        for i in range(1, len(peaks_ts)):
-            interval = ticks_diff(peaks_ts[i], peaks_ts[i - 1])
-            if interval <= 0:
-                continue
-            bpm = 60000 / interval
-            if self.MIN_BPM <= bpm <= self.MAX_BPM:
+        for i in range(1, n_peaks):
+            interval = tdiff(peaks_ts[i], peaks_ts[i - 1])
+            # Clamp on the integer interval; divide only for accepted beats
+            if self.MIN_INTERVAL_MS <= interval <= self.MAX_INTERVAL_MS:
                 idx = self._bpm_count % self.bpm_buffer_size
-                self._bpm_buf[idx] = bpm
+                self._bpm_buf[idx] = 60000 / interval
                 self._bpm_count += 1
 
         if self._bpm_count == 0:
@@ -186,6 +295,8 @@ def heart_rate_demo():
 
     IR_FINGER_THRESHOLD = 10000
     IR_AVG_WINDOW = 20
+    # Compare the rolling sum against threshold × window: no per-sample divide
+    IR_FINGER_SUM_THRESHOLD = IR_FINGER_THRESHOLD * IR_AVG_WINDOW
 
     hr_monitor = HeartRateMonitor(
         sample_rate=actual_rate,
@@ -196,26 +307,42 @@ def heart_rate_demo():
 
     while True:
         print("Place your finger on the sensor...")
+        sensor.check()
         while not sensor.check_finger(IR_FINGER_THRESHOLD):
             time.sleep_ms(20)
+            sensor.check()
 
         print("Finger detected! Starting heart rate measurement...\n")
+        # Drop the samples buffered while waiting: they predate the finger
+        # and would pull the IR average under the threshold
+        sensor.flush()
         hr_monitor.reset()
 
         ir_avg_sum = 0
         ir_avg_count = 0
-        ir_avg_buf = [0] * IR_AVG_WINDOW
+        ir_avg_buf = array('i', [0] * IR_AVG_WINDOW)
         ir_avg_idx = 0
 
-        hr_compute_interval = 2
+        hr_compute_interval_ms = 2000
         ref_time = ticks_ms()
         finger_present = True
 
+        # Bind the per-iteration callables once
+        check = sensor.check
+        available = sensor.available
+        # The demo only uses IR: popping it alone skips the red decode and
+        # the (red, ir) tuple allocated per sample
+        pop_ir = sensor.pop_ir_from_storage
+        add_sample = hr_monitor.add_sample
+        now_ms = ticks_ms
+        tdiff = ticks_diff
+
         while finger_present:
-            sensor.check()
+            check()
 
-            if sensor.available():
-                red_reading, ir_reading = sensor.pop_sample()
+            # Drain everything the burst read delivered before the next check
+            while available():
+                ir_reading = pop_ir()
 
                 old = ir_avg_buf[ir_avg_idx]
                 ir_avg_buf[ir_avg_idx] = ir_reading
@@ -224,22 +351,24 @@ def heart_rate_demo():
                 if ir_avg_count < IR_AVG_WINDOW:
                     ir_avg_count += 1
 
-                if ir_avg_count >= IR_AVG_WINDOW:
-                    ir_avg = ir_avg_sum / ir_avg_count
-                    if ir_avg < IR_FINGER_THRESHOLD:
-                        print("Finger removed.\n")
-                        finger_present = False
-                        break
+                if (ir_avg_count >= IR_AVG_WINDOW
+                        and ir_avg_sum < IR_FINGER_SUM_THRESHOLD):
+                    print("Finger removed.\n")
+                    finger_present = False
+                    break
+
+                add_sample(ir_reading)
 
-                hr_monitor.add_sample(ir_reading)
+            if not finger_present:
+                break
 
-            if ticks_diff(ticks_ms(), ref_time) / 1000 > hr_compute_interval:
+            if tdiff(now_ms(), ref_time) > hr_compute_interval_ms:
                 heart_rate = hr_monitor.calculate_heart_rate()
                 if heart_rate is not None:
                     print("Heart Rate: {:.0f} BPM".format(heart_rate))
                 else:
                     print("Not enough data to calculate heart rate")
-                ref_time = ticks_ms()
+                ref_time = now_ms()
 
 
 def main():
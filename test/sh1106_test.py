@@ -14,10 +14,34 @@ Hardware Setup:
 - I2C Address: 0x3C
 """
 
+import framebuf
 import time
 from machine import Pin, I2C
 from sh1106 import SH1106
 
+# Sample points for the test_mixed_graphics() graph, one per 5 px step
+_GRAPH_YS = (34, 48, 27, 52, 40, 22, 49, 31, 44, 38)
+
+# 16x16 heart bitmap, MSB-first rows (framebuf MONO_HLSB)
+_HEART = bytes([
+    0b00000000, 0b00000000,
+    0b01100000, 0b00000110,
+    0b11110000, 0b00001111,
+    0b11111000, 0b00011111,
+    0b11111100, 0b00111111,
+    0b11111110, 0b01111111,
+    0b11111111, 0b11111111,
+    0b11111111, 0b11111111,
+    0b01111111, 0b11111110,
+    0b00111111, 0b11111100,
+    0b00011111, 0b11111000,
+    0b00001111, 0b11110000,
+    0b00000111, 0b11100000,
+    0b00000011, 0b11000000,
+    0b00000001, 0b10000000,
+    0b00000000, 0b00000000,
+])
+
 
 class DisplayTester:
     """Test class for SH1106 OLED display."""
@@ -34,6 +58,16 @@ class DisplayTester:
         self.width = self.display.width
         self.height = self.display.height
 
+        # Checkerboard of 8x8 tiles, drawn once and blitted by test_pattern()
+        self._checker = framebuf.FrameBuffer(
+            bytearray(self.width * self.height // 8),
+            self.width, self.height, framebuf.MONO_VLSB
+        )
+        for x in range(0, self.width, 8):
+            for y in range(0, self.height, 8):
+                if (x // 8 + y // 8) % 2:
+                    self._checker.fill_rect(x, y, 8, 8, 1)
+
     def clear_and_wait(self, seconds=2):
         """Clear display and wait."""
         time.sleep(seconds)
@@ -56,10 +90,12 @@ class DisplayTester:
         print("Test 2: Pixel Control")
         self.display.fill(0)
 
-        # Draw a pattern of pixels
+        # Draw a pattern of pixels; bind the method once for the loop
+        px = self.display.pixel
+        height = self.height
         for x in range(0, self.width, 4):
-            for y in range(0, self.height, 4):
-                self.display.pixel(x, y, 1)
+            for y in range(0, height, 4):
+                px(x, y, 1)
 
         self.display.text("Pixel Test", 25, 28)
         self.display.show()
@@ -87,8 +123,11 @@ class DisplayTester:
         self.display.fill(0)
 
         # Nested rectangles (outline)
+        rect = self.display.rect
+        width = self.width
+        height = self.height
         for i in range(0, 30, 5):
-            self.display.rect(i, i, self.width - 2 * i, self.height - 2 * i, 1)
+            rect(i, i, width - 2 * i, height - 2 * i, 1)
 
         self.display.show()
         time.sleep(2)
@@ -185,16 +224,22 @@ class DisplayTester:
         self.display.show()
         time.sleep(1)
 
-        # Scroll right
+        # Scroll right in software (the SH1106 has no horizontal scroll);
+        # show() only resends the pages the text occupies
+        scroll = self.display.scroll
+        show = self.display.show
         for _ in range(64):
-            self.display.scroll(2, 0)
-            self.display.show()
+            scroll(2, 0)
+            show()
             time.sleep(0.02)
 
-        # Scroll down
-        for _ in range(32):
-            self.display.scroll(0, 2)
-            self.display.show()
+        # Scroll down in hardware: moving the display start line shifts the
+        # picture with one command per step, no framebuffer or page traffic.
+        # 32 steps of 2 rows wrap the full height and end back at line 0
+        start_line = self.display.start_line
+        height = self.height
+        for i in range(1, 33):
+            start_line((height - 2 * i) % height)
             time.sleep(0.02)
 
         self.clear_and_wait()
@@ -221,30 +266,12 @@ class DisplayTester:
         print("Test 11: Bitmap Drawing")
         self.display.fill(0)
 
-        # Simple 16x16 heart bitmap
-        heart = bytearray([
-            0b00000000, 0b00000000,
-            0b01100000, 0b00000110,
-            0b11110000, 0b00001111,
-            0b11111000, 0b00011111,
-            0b11111100, 0b00111111,
-            0b11111110, 0b01111111,
-            0b11111111, 0b11111111,
-            0b11111111, 0b11111111,
-            0b01111111, 0b11111110,
-            0b00111111, 0b11111100,
-            0b00011111, 0b11111000,
-            0b00001111, 0b11110000,
-            0b00000111, 0b11100000,
-            0b00000011, 0b11000000,
-            0b00000001, 0b10000000,
-            0b00000000, 0b00000000,
-        ])
-
-        # Draw hearts
-        self.display.draw_bitmap(20, 24, heart, 16, 16, 1)
-        self.display.draw_bitmap(56, 24, heart, 16, 16, 1)
-        self.display.draw_bitmap(92, 24, heart, 16, 16, 1)
+        # Draw hearts: _HEART is bytes, so draw_bitmap() wraps it in a
+        # FrameBuffer on the first call and the other two are a cached blit
+        draw_bitmap = self.display.draw_bitmap
+        draw_bitmap(20, 24, _HEART, 16, 16, 1)
+        draw_bitmap(56, 24, _HEART, 16, 16, 1)
+        draw_bitmap(92, 24, _HEART, 16, 16, 1)
 
         self.display.text("Bitmaps!", 35, 50)
         self.display.show()
@@ -259,26 +286,50 @@ class DisplayTester:
         dx, dy = 3, 2
         radius = 8
 
-        for _ in range(100):
-            self.display.fill(0)
-
-            # Draw border
-            self.display.rect(0, 0, self.width, self.height, 1)
+        # Clear and draw the border once; each frame only erases the ball's
+        # previous bounding box, clipped to the inside of the border
+        display = self.display
+        width = self.width
+        height = self.height
+        fill_rect = display.fill_rect
+        circle = display.circle
+        display.fill(0)
+        display.rect(0, 0, width, height, 1)
+        right = width - 2
+        bottom = height - 2
+        prev_x = prev_y = None
 
+        for _ in range(100):
             # Update position
             x += dx
             y += dy
 
             # Bounce off walls
-            if x <= radius or x >= self.width - radius:
+            if x <= radius or x >= width - radius:
                 dx = -dx
-            if y <= radius or y >= self.height - radius:
+            if y <= radius or y >= height - radius:
                 dy = -dy
 
+            # Erase the previous ball
+            if prev_x is not None:
+                x0 = max(prev_x - radius, 1)
+                y0 = max(prev_y - radius, 1)
+                x1 = min(prev_x + radius, right)
+                y1 = min(prev_y + radius, bottom)
+                fill_rect(x0, y0, x1 - x0 + 1, y1 - y0 + 1, 0)
+
             # Draw ball
-            self.display.circle(x, y, radius, 1, fill=True)
+            circle(x, y, radius, 1, fill=True)
+
+            # Flush only the pages the old and new ball boxes touch
+            if prev_x is None:
+                display.show()
+            else:
+                top = max(min(prev_y, y) - radius, 0)
+                bot = min(max(prev_y, y) + radius, height - 1)
+                display.show_pages(top // 8, bot // 8 + 1)
+            prev_x, prev_y = x, y
 
-            self.display.show()
             time.sleep(0.03)
 
         self.clear_and_wait(1)
@@ -287,12 +338,8 @@ class DisplayTester:
         """Test pattern display."""
         print("Test 13: Patterns")
 
-        # Checkerboard pattern
-        self.display.fill(0)
-        for x in range(0, self.width, 8):
-            for y in range(0, self.height, 8):
-                if (x // 8 + y // 8) % 2:
-                    self.display.fill_rect(x, y, 8, 8, 1)
+        # Checkerboard pattern, precomputed in __init__: one C-level copy
+        self.display.blit(self._checker, 0, 0)
         self.display.show()
         time.sleep(2)
 
@@ -309,12 +356,17 @@ class DisplayTester:
             0b11111111,
         ]
 
-        zone_width = self.width // 8
-        for zone in range(8):
-            for y in range(self.height):
-                for x in range(zone * zone_width, (zone + 1) * zone_width):
-                    if patterns[zone] & (1 << (x % 8)):
-                        self.display.pixel(x, y, 1)
+        # Each column is either fully lit or dark, so build one page row of
+        # MONO_VLSB bytes (0xFF = 8 lit pixels) and copy it into every page
+        width = self.width
+        zone_width = width // 8
+        row = bytearray(width)
+        for x in range(width):
+            if patterns[x // zone_width] & (1 << (x & 7)):
+                row[x] = 0xFF
+        buf = self.display.buffer
+        for page in range(self.display.pages):
+            buf[page * width:(page + 1) * width] = row
 
         self.display.show()
         self.clear_and_wait()
@@ -331,13 +383,15 @@ class DisplayTester:
         # Graph area
         self.display.rect(5, 15, 60, 45, 1)
 
-        # Simulate graph data
-        import random
+        # Simulate graph data from a fixed table: no random module or PRNG
+        # calls, and the same picture on every run
+        line = self.display.line
         prev_y = 40
-        for x in range(10, 60, 5):
-            y = random.randint(20, 55)
-            self.display.line(x - 5, prev_y, x, y, 1)
+        x = 10
+        for y in _GRAPH_YS:
+            line(x - 5, prev_y, x, y, 1)
             prev_y = y
+            x += 5
 
         # Status indicators
         self.display.circle(85, 25, 8, 1, fill=True)